@@ -247,6 +247,10 @@ resource "aws_ecs_task_definition" "anomaly_detection_task" {
         {
           name  = "DASHBOARD_SERVICE_URL"
           value = "http://dashboard.ecs.local:5002/receive_data"
+        },
+        {
+          name  = "LOG_LEVEL"
+          value = "WARNING"
         }
       ]
       portMappings = [
@@ -10,39 +10,40 @@ import json
 import numpy as np
 import pandas as pd
 
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# One random generator for the whole dataset. Pass a seed to default_rng() for reproducible datasets.
+RNG = np.random.default_rng()
+
+# Maps the distribution names of the features config to the generator: (params, sample_size) -> np.ndarray
+DISTRIBUTIONS = {
+    "normal": lambda params, size: RNG.normal(params["mean"], params["std"], size),
+    "uniform": lambda params, size: RNG.uniform(params["low"], params["high"], size),
+    "exponential": lambda params, size: RNG.exponential(params["scale"], size),
+    "poisson": lambda params, size: RNG.poisson(params["lam"], size),
+    "lognormal": lambda params, size: RNG.lognormal(params["mean"], params["sigma"], size),
+    "gamma": lambda params, size: RNG.gamma(params["shape"], params["scale"], size),
+    "beta": lambda params, size: RNG.beta(params["a"], params["b"], size),
+    "weibull": lambda params, size: RNG.weibull(params["a"], size),
+    "triangular": lambda params, size: RNG.triangular(params["left"], params["mode"], params["right"], size),
+    "chisquare": lambda params, size: RNG.chisquare(params["df"], size),
+}
 
 def generate_data_per_feature(distribution: str, params, sample_size: int):
     """
     Generates the data for the feature according to the configuration.
+    The data is stored as float32, which is precise enough for the sensor values and halves the size of the datasets.
     
     Args:
         distribution(str): Defines the type of distribution for the data generation.
         params: Defines the parameters for the distribution.
         sample_size(int): Defines the number of data points.
     """
-    if distribution == "normal":
-        return np.random.normal(params["mean"], params["std"], sample_size)
-    elif distribution == "uniform":
-        return np.random.uniform(params["low"], params["high"], sample_size)
-    elif distribution == "exponential":
-        return np.random.exponential(params["scale"], sample_size)
-    elif distribution == "poisson":
-        return np.random.poisson(params["lam"], sample_size)
-    elif distribution == "lognormal":
-        return np.random.lognormal(params["mean"], params["sigma"], sample_size)
-    elif distribution == "gamma":
-        return np.random.gamma(params["shape"], params["scale"], sample_size)
-    elif distribution == "beta":
-        return np.random.beta(params["a"], params["b"], sample_size)
-    elif distribution == "weibull":
-        return np.random.weibull(params["a"], sample_size)
-    elif distribution == "triangular":
-        return np.random.triangular(params["left"], params["mode"], params["right"], sample_size)
-    elif distribution == "chisquare":
-        return np.random.chisquare(params["df"], sample_size)
-    else:
-        raise ValueError(f"Distribution not supported: {distribution}")    
+    try:
+        generator = DISTRIBUTIONS[distribution]
+    except KeyError:
+        raise ValueError(f"Distribution not supported: {distribution}") from None
+    return generator(params, sample_size).astype(np.float32, copy=False)
 
 
 def generate_dataset(sample_size: int =50000, timestamp_interval: int =5, features_config=None):
@@ -62,6 +63,7 @@ def generate_dataset(sample_size: int =50000, timestamp_interval: int =5, featur
     data = {}
     
     start_time = datetime.now()
+    sample_index = np.arange(sample_size, dtype=np.float32)
     
     for feature in features_config.values():
         feature_name = feature['name']
@@ -77,14 +79,17 @@ def generate_dataset(sample_size: int =50000, timestamp_interval: int =5, featur
             sample_size=sample_size
         )
         
-        anomalies = np.random.rand(sample_size) < anomaly_ratio
-        feature_data[anomalies] = np.random.uniform(anomaly_range[0], anomaly_range[1], size=anomalies.sum())        
-        feature_data += np.arange(sample_size) * drift
+        anomaly_values = RNG.uniform(anomaly_range[0], anomaly_range[1], sample_size).astype(np.float32, copy=False)
+        anomalies = RNG.random(sample_size, dtype=np.float32) < anomaly_ratio
+        np.copyto(feature_data, anomaly_values, where=anomalies)
+        if drift != 0:
+            feature_data += sample_index * drift
         data[feature_name] = feature_data
 
     
-    timestamps = [start_time + timedelta(seconds=i * timestamp_interval) for i in range(sample_size)]
-    data["timestamp"] = timestamps
+    start = np.datetime64(start_time, "ns")
+    step = np.timedelta64(timestamp_interval, "s")
+    data["timestamp"] = start + np.arange(sample_size, dtype=np.int64) * step
     df = pd.DataFrame(data)
     
     return df
@@ -109,15 +114,15 @@ if __name__ == "__main__":
     
     # Default setting is 50,000
     datasets = [
-        (50000, "src/data/synthetic_data/synthetic_training_data.csv"),
-        (12500, "src/data/synthetic_data/synthetic_test_data.csv"),
-        (25000, "src/data/synthetic_data/synthetic_validation_data.csv")
+        (50000, "src/data/synthetic_data/synthetic_training_data.parquet"),
+        (12500, "src/data/synthetic_data/synthetic_test_data.parquet"),
+        (25000, "src/data/synthetic_data/synthetic_validation_data.parquet")
     ]
 
     features_config = load_features_config("src/production/stream_data/features_config.json")
     
     for sample_size, output_file in datasets:
         df = generate_dataset(sample_size=sample_size, timestamp_interval=timestamp_interval, features_config=features_config)
-        df.to_csv(output_file, index=False, encoding='utf-8')
+        df.to_parquet(output_file, engine="pyarrow", compression="snappy", index=False)
         
     print("Data generated")
\ No newline at end of file
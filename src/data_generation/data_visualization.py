@@ -3,20 +3,28 @@ This script serves to visualize the generated dataset.
 It requires that a timestamp is available in the dataset.
 It does not change any data. Just for visualization purposes.
 """
+import os
+# Each plot runs in its own process. Limit the math libraries to one thread per process to avoid oversubscription.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 import matplotlib.pyplot as plt
 import multiprocessing
+import numpy as np
 import pandas as pd
 
-def save_plot(feature: str, df: pd.DataFrame):
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def save_plot(feature: str, timestamps: np.ndarray, values: np.ndarray):
     """
     Saves a plot of each feature's values.
     
     Args:
         feature (str): Feature name
-        df (pd.DataFrame): Data for the plots.
+        timestamps (np.ndarray): Timestamps of the data (x-axis).
+        values (np.ndarray): Values of the feature (y-axis).
     """
     plt.figure(figsize=(40, 6))
-    plt.plot(df['timestamp'], df[feature], label=feature)
+    plt.plot(timestamps, values, label=feature)
     plt.title(f'{feature} over Time')
     plt.xlabel('Timestamp')
     plt.ylabel(feature)
@@ -29,18 +37,33 @@ def save_plot(feature: str, df: pd.DataFrame):
     plt.close()
 
 
-def worker(features: list, df: pd.DataFrame, queue):
+def worker(feature: str, timestamps: np.ndarray, values: np.ndarray):
     """
-    Worker that processes a chunk of features.
+    Worker that saves the plot of one feature.
+    Only the timestamps and the values of this feature are sent to the process, not the whole dataframe.
     
     Args:
-        features (list): List of features.
-        df (pd.DataFrame): Data for the plots.
-        queue: Queue for the processes.
+        feature (str): Feature name.
+        timestamps (np.ndarray): Timestamps of the data.
+        values (np.ndarray): Values of the feature.
+        
+    Returns:
+        str: Status message for the plot.
+    """
+    save_plot(feature=feature, timestamps=timestamps, values=values)
+    return f'{feature} saved'
+
+
+def available_cpus():
+    """
+    Returns the number of CPUs the process may run on.
+    In a container this respects the CPU restriction, unlike multiprocessing.cpu_count().
     """
-    for feature in features:
-        save_plot(feature=feature, df=df)
-        queue.put(f'{feature} saved')
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity is not available on all platforms (e.g. macOS).
+        return multiprocessing.cpu_count()
 
 
 def run_plotting(features: list, df: pd.DataFrame):
@@ -54,29 +77,23 @@ def run_plotting(features: list, df: pd.DataFrame):
     if not features:
         raise ValueError("No valid input for the features found.")
             
-    num_processes = multiprocessing.cpu_count()
-    chunk_size = max(1, len(features) // num_processes)
-    chunks = [features[i:i + chunk_size] for i in range(0, len(features), chunk_size)]
-
-    queue = multiprocessing.Queue()
-
-    processes = []
-    for chunk in chunks:
-        process = multiprocessing.Process(target=worker, args=(chunk, df, queue))
-        processes.append(process)
-        process.start()
-
-    for _ in range(len(features)):
-        print(queue.get())
+    num_processes = min(len(features), available_cpus())
+    timestamps = df['timestamp'].to_numpy()
+    values = [df[feature].to_numpy() for feature in features]
 
-    for process in processes:
-        process.join()
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        futures = [
+            executor.submit(worker, feature, timestamps, feature_values)
+            for feature, feature_values in zip(features, values)
+        ]
+        for future in as_completed(futures):
+            print(future.result())
 
 
 if __name__ == "__main__":
     
-    input_file = "src/data/synthetic_data/synthetic_training_data.csv"
-    df = pd.read_csv(input_file)
+    input_file = "src/data/synthetic_data/synthetic_training_data.parquet"
+    df = pd.read_parquet(input_file)
     
     features = df.columns.tolist()
     features.remove("timestamp")
@@ -11,23 +11,28 @@ import joblib
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 from mpl_toolkits.mplot3d import Axes3D
-from sklearn.metrics import pairwise_distances
 
 def load_dataset(file_path: str):
     """
     Loads a dataset for the training of the algorithm.
     There is no data split required. See data_generator.py
+    Parquet files (output of data_generator.py) are read directly, all other files are read as CSV.
     
     Args:
         file_path (str): Path to the dataset containing the training data.
     """
     try:
-        df = pd.read_csv(file_path)
+        if file_path.endswith(".parquet"):
+            df = pd.read_parquet(file_path)
+        else:
+            df = pd.read_csv(file_path)
         return df
     except Exception as e:
-        print(f"Error when trying to load the csv file. Code: {e}")
+        print(f"Error when trying to load the dataset. Code: {e}")
         return None
 
 
@@ -48,6 +53,45 @@ def load_model(path: str):
         return None        
 
 
+def save_results(df: pd.DataFrame, path: str):
+    """
+    Saves the results as CSV file.
+    Uses the C++ CSV writer of pyarrow, which is much faster than DataFrame.to_csv.
+    
+    Args:
+        df (pd.DataFrame): The results to be saved.
+        path (str): Path to the CSV file.
+    """
+    pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+
+
+def min_center_distances(features: np.ndarray, centers: np.ndarray):
+    """
+    Calculates the euclidean distance of each data point to its closest cluster center.
+    Uses ||x - c||² = ||x||² + ||c||² - 2x·c, so the main work is a single (float32) matrix product.
+    Both are shifted by the mean of the centers first (distances do not change), so float32 stays accurate
+    for features with a large offset compared to their spread.
+    
+    Args:
+        features (np.ndarray): The data points, shape (n_samples, n_features).
+        centers (np.ndarray): The cluster centers, shape (n_clusters, n_features).
+        
+    Return:
+        min_distances (np.ndarray): The distance to the closest center for each data point.
+    """
+    reference = centers.mean(axis=0)
+    features = (features - reference).astype(np.float32, copy=False)
+    centers = (centers - reference).astype(np.float32, copy=False)
+    
+    features_sq = np.einsum("ij,ij->i", features, features)[:, np.newaxis]
+    centers_sq = np.einsum("ij,ij->i", centers, centers)
+    squared_distances = features_sq + centers_sq - 2 * (features @ centers.T)
+    
+    # Rounding can lead to slightly negative values for points on a center.
+    min_distances = np.sqrt(np.maximum(squared_distances.min(axis=1), 0))
+    return min_distances
+
+
 def kmeans_testing(test_data: pd.DataFrame, model, threshold: float):
     """
     Tests the KMeans Model.
@@ -65,13 +109,11 @@ def kmeans_testing(test_data: pd.DataFrame, model, threshold: float):
     if model is None:
         raise ValueError("No valid input for the model found.")
     
-    results = test_data.copy()
-    features = results.select_dtypes(include=[np.number])
-    distances = pairwise_distances(features, model.cluster_centers_, metric="euclidean")
-    min_distances = np.min(distances, axis=1)
+    # The cluster centers are in the order of the training features.
+    features = test_data[list(model.feature_names_in_)].to_numpy(dtype=np.float64)
+    min_distances = min_center_distances(features=features, centers=model.cluster_centers_)
     
-    results["min_distance"] = min_distances
-    results["anomaly"]= min_distances > threshold
+    results = test_data.assign(min_distance=min_distances, anomaly=min_distances > threshold)
     
     return results
 
@@ -92,11 +134,11 @@ def ocsvm_testing(test_data: pd.DataFrame, model):
     if model is None:
         raise ValueError("No valid input for the model found.")
     
-    results = test_data.copy()
-    features = results.select_dtypes(include=[np.number])
+    # Keeps the column names in the order of the training, so sklearn can still check the features.
+    features = test_data[list(model.feature_names_in_)]
     
     predictions = model.predict(features)
-    results["anomaly"] = predictions == -1
+    results = test_data.assign(anomaly=predictions == -1)
     
     return results
 
@@ -135,25 +177,36 @@ def result_comparison(kmeans_results: pd.DataFrame, ocsvm_results: pd.DataFrame)
         kmeans_results (pd.DataFrame): The annotated data from testing the KMeans-model.
         ocsvm_results (pd.DataFrame): The annotated data from testing the OCSVM-Model.    
     """
-    # Merge the results on the timestamp in order to compare the predictions.
-    merged_results = pd.merge(
-        kmeans_results[['timestamp', 'anomaly']],
-        ocsvm_results[['timestamp', 'anomaly']],
-        on='timestamp',
-        suffixes=('_kmeans', '_ocsvm')
-    )
+    # Both results are created from the same test set in the same order, so they can be aligned by position.
+    if len(kmeans_results) != len(ocsvm_results):
+        raise ValueError("The KMeans and OCSVM results do not have the same length.")
+    
+    timestamps = kmeans_results["timestamp"].to_numpy()
+    if not (timestamps == ocsvm_results["timestamp"].to_numpy()).all():
+        raise ValueError("The KMeans and OCSVM results do not have the same timestamps.")
+    
+    merged_results = pd.DataFrame({
+        "timestamp": timestamps,
+        "anomaly_kmeans": kmeans_results["anomaly"].to_numpy(),
+        "anomaly_ocsvm": ocsvm_results["anomaly"].to_numpy()
+    })
         
     merged_results["match"] = merged_results["anomaly_kmeans"] == merged_results["anomaly_ocsvm"]
 
-    kmeans_anomalies = merged_results["anomaly_kmeans"].sum()
-    ocsvm_anomalies = merged_results["anomaly_ocsvm"].sum()    
-    only_kmeans_anomaly = ((merged_results["anomaly_kmeans"] == 1) & (merged_results["anomaly_ocsvm"] == 0)).sum()
-    only_ocsvm_anomaly = ((merged_results["anomaly_kmeans"] == 0) & (merged_results["anomaly_ocsvm"] == 1)).sum()
-    both_anomaly = ((merged_results["anomaly_kmeans"] == 1) & (merged_results["anomaly_ocsvm"] == 1)).sum()
+    # Count all four combinations in one pass: code = 2 * kmeans + ocsvm.
+    kmeans_flags = merged_results["anomaly_kmeans"].to_numpy().astype(np.uint8)
+    ocsvm_flags = merged_results["anomaly_ocsvm"].to_numpy().astype(np.uint8)
+    counts = np.bincount((kmeans_flags << 1) | ocsvm_flags, minlength=4)
+
+    only_ocsvm_anomaly = counts[1]
+    only_kmeans_anomaly = counts[2]
+    both_anomaly = counts[3]
+    kmeans_anomalies = only_kmeans_anomaly + both_anomaly
+    ocsvm_anomalies = only_ocsvm_anomaly + both_anomaly
 
     intersection_over_union = both_anomaly / (kmeans_anomalies+ocsvm_anomalies-both_anomaly)
     
-    merged_results.to_csv("src/data/test_results/merged_lists.csv")
+    save_results(df=merged_results, path="src/data/test_results/merged_lists.csv")
     print("Comparison Results:")
     print(f"Total anomalies (K-Means & OCSVM): {kmeans_anomalies}       {ocsvm_anomalies}")
     print(f"Only one model (K-Means & OCSVM):  {only_kmeans_anomaly}        {only_ocsvm_anomaly}")
@@ -171,12 +224,9 @@ def kmeans_visualization(df: pd.DataFrame, kmeans_model, path: str, num_points:
         num_points (int, default=100): The number of random points visualized.
     """
     feature_columns = ["temperature", "humidity", "noise_level"]
-    features = df[feature_columns]
-    anomalies = df[df['anomaly'] == True].reset_index(drop=True)
-    
-    feature_columns = ["temperature", "humidity", "noise_level"]
-    features = df[feature_columns]
-    anomalies = df[df['anomaly'] == True].reset_index(drop=True)
+    anomalies = df.loc[df["anomaly"], feature_columns]
+    # Only plot a random subset, the 3D renderer scales badly with the number of points.
+    anomalies = anomalies.sample(n=min(num_points, len(anomalies)), random_state=0).to_numpy()
     
     centroids = kmeans_model.cluster_centers_[:, :3]
 
@@ -184,7 +234,7 @@ def kmeans_visualization(df: pd.DataFrame, kmeans_model, path: str, num_points:
     ax_1 = fig_1.add_subplot(111, projection="3d")
     
     ax_1.scatter(
-        anomalies[feature_columns[0]], anomalies[feature_columns[1]], anomalies[feature_columns[2]],
+        *anomalies.T,
         c="pink", label="Anomalies", alpha=0.9
     )
 
@@ -207,7 +257,7 @@ def kmeans_visualization(df: pd.DataFrame, kmeans_model, path: str, num_points:
 if __name__ == "__main__":
 
     # Load Testing data
-    test_data_path = "src/data/synthetic_data/synthetic_test_data.csv"
+    test_data_path = "src/data/synthetic_data/synthetic_test_data.parquet"
     test_data = load_dataset(test_data_path)
     
     # Test KMeans
@@ -220,7 +270,7 @@ if __name__ == "__main__":
     
     threshold = 13.6
     kmeans_results = kmeans_testing(test_data=test_data, model=kmeans_model, threshold=threshold)
-    kmeans_results.to_csv("src/data/test_results/test_results_kmeans.csv", index=False)
+    save_results(df=kmeans_results, path=kmeans_test_results_path)
     
     # Only to be used for the standard set of sensors - temperature, humidity and noise level.
     kmeans_visualization(df=df_kmeans, kmeans_model=kmeans_model, path=image_path)
@@ -236,7 +286,7 @@ if __name__ == "__main__":
     df_ocsvm = load_dataset(ocsvm_test_results_path)
     
     ocsvm_results = ocsvm_testing(test_data=test_data, model=ocsvm_model)
-    ocsvm_results.to_csv("src/data/test_results/test_results_ocsvm.csv", index=False)
+    save_results(df=ocsvm_results, path=ocsvm_test_results_path)
     
     ocsvm_results = base_metrics(df=df_ocsvm)
     print("OCSVM-Results:")
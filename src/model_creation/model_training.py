@@ -12,24 +12,35 @@ import os
 import pandas as pd
 
 from sklearn.cluster import KMeans
+from sklearn.kernel_approximation import RBFSampler
+from sklearn.linear_model import SGDOneClassSVM
+from sklearn.pipeline import make_pipeline
 from sklearn.svm import OneClassSVM
 
 os.environ["PYTHONIOENCODING"] = "utf-8"
 os.environ["LOKY_MAX_CPU_COUNT"] = "14"
 
+# Training score range / temperature of the anomaly detection service.
+# Matches temp = 10 of the RBF-OCSVM, whose training scores range over about +-300.
+SCORE_RANGE_PER_TEMP = 60
+
 def load_dataset(file_path: str):
     """
     Loads a dataset for the training of the algorithm.
     There is no data split required. See data_generator.py
+    Parquet files (output of data_generator.py) are read directly, all other files are read as CSV.
     
     Args:
         file_path (str): Path to the dataset containing the training data.
     """
     try:
-        df = pd.read_csv(file_path)
+        if file_path.endswith(".parquet"):
+            df = pd.read_parquet(file_path)
+        else:
+            df = pd.read_csv(file_path)
         return df
     except Exception as e:
-        print(f"Error when trying to load the csv file. Code: {e}")
+        print(f"Error when trying to load the dataset. Code: {e}")
         return None
 
 def kmeans_training(df: pd.DataFrame, path: str, clusters: int =3):
@@ -56,7 +67,7 @@ def kmeans_training(df: pd.DataFrame, path: str, clusters: int =3):
     
     joblib.dump(kmeans, path)
     
-def ocsvm_training(df: pd.DataFrame, path: str, kernel: str ="rbf", nu: float = 0.04, gamma: str ="scale"):
+def ocsvm_training(df: pd.DataFrame, path: str, kernel: str ="rbf", nu: float = 0.04, gamma: str ="scale", cache_size: float =512):
     """
     Trains a One-Class Support Vector Machine.
     Args:
@@ -65,6 +76,7 @@ def ocsvm_training(df: pd.DataFrame, path: str, kernel: str ="rbf", nu: float =
         kernel (str, default = "rbf"): Hyperparameter for the OCSVM.
         nu (float, default = 0.04): Hyperparameter for the OCSVM.
         gamma (str, default = "scale"): Hyperparameter for the OCSVM.
+        cache_size (float, default = 512): Size of the kernel cache in MB. Larger caches avoid recomputing kernel values during the fit.
     """
     
     if df is None or df.empty:
@@ -74,14 +86,48 @@ def ocsvm_training(df: pd.DataFrame, path: str, kernel: str ="rbf", nu: float =
     if features.empty:
         raise ValueError("No valid input for the features found.")
     
-    ocsvm = OneClassSVM(kernel=kernel, nu=nu, gamma=gamma)
+    ocsvm = OneClassSVM(kernel=kernel, nu=nu, gamma=gamma, cache_size=cache_size)
     ocsvm.fit(features)
     
     path=f"{path}/ocsvm_model.pkl"
-    joblib.dump(ocsvm, path)
+    # Stored uncompressed, so the anomaly detection can memory-map the arrays instead of copying them.
+    joblib.dump(ocsvm, path, protocol=5, compress=0)
+
+def rff_ocsvm_training(df: pd.DataFrame, path: str, nu: float = 0.04, gamma: str ="scale", n_components: int =500):
+    """
+    Trains a linear One-Class Support Vector Machine on Random Fourier Features, approximating the RBF-OCSVM.
+    The prediction costs one dot product with n_components values instead of one kernel value per support vector.
+    Stored with the same name as the OCSVM, the anomaly detection can use both models.
+    The scores are much smaller than the OCSVM scores (about +-0.2 instead of +-300), so the temperature for the
+    probabilities is derived from the training score range and stored with the model (score_temperature_).
+    Args:
+        df (pd.DataFrame): The dataset for training.
+        path (str): The path to store the weights/parameters of the model.
+        nu (float, default = 0.04): Hyperparameter for the OCSVM.
+        gamma (str, default = "scale"): Hyperparameter for the RBF kernel approximation.
+        n_components (int, default = 500): Number of random features. Higher values approximate the RBF kernel better.
+    """
+    
+    if df is None or df.empty:
+        raise ValueError("No valid input for the dataframe found.")
+    
+    features = df.select_dtypes(include=[np.number])
+    if features.empty:
+        raise ValueError("No valid input for the features found.")
+    
+    rff_ocsvm = make_pipeline(
+        RBFSampler(gamma=gamma, n_components=n_components, random_state=17),
+        SGDOneClassSVM(nu=nu, random_state=17)
+    )
+    rff_ocsvm.fit(features)
+    training_scores = rff_ocsvm.decision_function(features)
+    rff_ocsvm.score_temperature_ = float(np.ptp(training_scores) / SCORE_RANGE_PER_TEMP)
+    
+    path=f"{path}/ocsvm_model.pkl"
+    joblib.dump(rff_ocsvm, path, protocol=5, compress=0)
 
 if __name__=="__main__":
-    file_path = "src/data/synthetic_data/synthetic_training_data.csv"
+    file_path = "src/data/synthetic_data/synthetic_training_data.parquet"
     df = load_dataset(file_path=file_path)
     
     # Path to the directory to store the models.
@@ -97,7 +143,12 @@ if __name__=="__main__":
     kernel  ="rbf"
     nu = 0.04
     gamma = "scale"
-    ocsvm_training(df=df, path=path, kernel=kernel, nu=nu, gamma=gamma)
+    # Set to True to train the faster Random-Fourier-Features approximation instead of the OCSVM.
+    use_random_features = False
+    if use_random_features:
+        rff_ocsvm_training(df=df, path=path, nu=nu, gamma=gamma)
+    else:
+        ocsvm_training(df=df, path=path, kernel=kernel, nu=nu, gamma=gamma)
     print("Finished training OCSVM-model.")
     
     
\ No newline at end of file
@@ -1,6 +1,8 @@
 import joblib
 import logging
 import numpy as np
+import operator
+import orjson
 import os
 import pandas as pd
 import requests
@@ -8,10 +10,16 @@ import threading
 import time
 
 from collections import deque
-from datetime import datetime
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from queue import Empty, SimpleQueue
+from requests.adapters import HTTPAdapter
+from scipy.special import expit
+from sklearn.pipeline import Pipeline
+from urllib3.util.retry import Retry
 
-logging.basicConfig(level=logging.INFO)
+# Set LOG_LEVEL=DEBUG to log every received message and transfer.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
 # To run locally, without container.
@@ -21,11 +29,18 @@ MODEL_PATH = "ocsvm_model.pkl"
 DASHBOARD_SERVICE_URL = os.getenv("DASHBOARD_SERVICE_URL", "http://dashboard_container:5002/dashboard")
 
 MAX_QUEUE_LEN = 1000
-temp = 10.0              # Modify for sensitivity of prediction score
+DASHBOARD_BATCH_SIZE = 64    # Max. number of results sent to the dashboard with one request
+DETECTION_BATCH_SIZE = 64    # Max. number of inputs evaluated by the model at once
+TRANSFER_LOG_INTERVAL = 1000 # Number of results sent to the dashboard between two info logs
+TEMP_DATA_LEN = 1000         # Number of latest results kept for the health check
+JSON_HEADERS = {"Content-Type": "application/json"}
+temp = 10.0              # Modify for sensitivity of prediction score (RBF-OCSVM)
 
 def load_model(path:str):
     """
     Load the model data.
+    The arrays of the model are memory-mapped (read only) from the file instead of being copied into memory.
+    This requires an uncompressed model file, see model_training.py.
     Args:
         path (str): The path to the model data (PKL).
     
@@ -33,7 +48,7 @@ def load_model(path:str):
         model: The loaded model.
     """
     try:
-        model = joblib.load(path)
+        model = joblib.load(path, mmap_mode="r")
         logger.info("Model loaded successfully.")
         return model
     except Exception as e:
@@ -42,169 +57,347 @@ def load_model(path:str):
 
 ocsvm_model = load_model(MODEL_PATH)
 
-input_data_queue = deque()
+# The Random-Fourier-Features model has much smaller scores, its temperature is stored with the model (see model_training.py).
+model_temp = getattr(ocsvm_model, "score_temperature_", None)
+if model_temp is not None:
+    temp = model_temp
+    logger.info(f"Using the temperature of the model: {temp}")
+
+# Validated once at startup, normalize_scores only multiplies with the inverse.
+if temp <= 0:
+    temp = 10.0
+    logger.warning("Temp set too low, changed to standard value of 10.")
+inv_temp = 1.0 / temp
+
+# The feature order is fixed by the model. It is cached once, so the detection loop can work on plain NumPy arrays.
+MODEL_FEATURES = tuple(ocsvm_model.feature_names_in_)
+MODEL_FEATURES_SET = frozenset(MODEL_FEATURES)
+feature_getter = operator.itemgetter(*MODEL_FEATURES)
+model_input = np.empty((DETECTION_BATCH_SIZE, len(MODEL_FEATURES)), dtype=np.float64)
+# The model input is always built in MODEL_FEATURES order, the feature name check of sklearn is not needed.
+# For the Random-Fourier-Features model (pipeline), the check is done by the first step.
+if isinstance(ocsvm_model, Pipeline):
+    ocsvm_model[0].feature_names_in_ = None
+else:
+    ocsvm_model.feature_names_in_ = None
+
+# For the RBF-OCSVM the deployed model is fixed, the parts of the decision function are extracted once.
+# Stored as float32 to halve the memory traffic when going through the support vectors.
+use_rbf_kernel = getattr(ocsvm_model, "kernel", None) == "rbf"
+# gamma is folded into the constant terms: -gamma * ||x - sv||² = 2gamma * x·sv - gamma * ||sv||² - gamma * ||x||².
+# The support vectors and the inputs are shifted by the mean of the support vectors (distances do not change),
+# so float32 stays accurate for features with a large offset compared to their spread.
+if use_rbf_kernel:
+    kernel_gamma = np.float32(ocsvm_model._gamma)
+    kernel_center = ocsvm_model.support_vectors_.mean(axis=0)
+    support_vectors = (ocsvm_model.support_vectors_ - kernel_center).astype(np.float32)
+    scaled_support_vectors_t = np.ascontiguousarray((2 * kernel_gamma * support_vectors).T)
+    support_vector_terms = -kernel_gamma * np.einsum("ij,ij->i", support_vectors, support_vectors)
+    dual_coef = ocsvm_model.dual_coef_[0].astype(np.float32)
+    intercept = float(ocsvm_model.intercept_[0])
+
+# The input queue is only written by the request handlers and read by the detection thread.
+# SimpleQueue handles the locking and the blocking read internally (in C).
+input_data_queue = SimpleQueue()
 output_data_queue = deque()
-temp_data = pd.DataFrame(columns=["timestamp"] + list(ocsvm_model.feature_names_in_) + ["is_anomaly"])
 
-input_data_lock = threading.Lock()
-output_data_lock = threading.Lock()
-temp_data_lock = threading.Lock()
+# Ring buffer with the latest results for the health check, one preallocated array per column.
+temp_timestamps = np.empty(TEMP_DATA_LEN, dtype="datetime64[ns]")
+temp_is_anomaly = np.empty(TEMP_DATA_LEN, dtype=bool)
+temp_data_cursor = 0         # Total number of results written, the next write position is cursor % TEMP_DATA_LEN
+
+# Condition instead of a plain lock, so the reader can wait for new data instead of polling the queue.
+output_data_lock = threading.Condition(threading.Lock())
+
+dashboard_session = requests.Session()
+dashboard_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=Retry(total=2, backoff_factor=0.1)))
+
+def put_input_data(data):
+    """
+    Appends data to the input queue. Ensures that the queue does not exceed the maximum length.
+    
+    Args:
+        data: The data to be appended to the queue.
+    """
+    if input_data_queue.qsize() >= MAX_QUEUE_LEN:
+        try:
+            input_data_queue.get_nowait()
+            logger.warning("Max queue len - deleting the oldest entry.")
+        except Empty:
+            pass
+    input_data_queue.put(data)
+
+def read_input_batch(max_items: int, timeout: float):
+    """
+    Reads up to max_items entries from the input queue. Removes the read data.
+    If the queue is empty, waits until new data is appended or the timeout is reached.
+    
+    Args:
+        max_items (int): Maximum number of entries read at once.
+        timeout (float): Max. time in sec to wait for data.
+        
+    Returns:
+        batch (list): The read data in queue order. Empty if no data arrived in time.
+    """
+    try:
+        batch = [input_data_queue.get(timeout=timeout)]
+    except Empty:
+        return []
+    
+    while len(batch) < max_items:
+        try:
+            batch.append(input_data_queue.get_nowait())
+        except Empty:
+            break
+    return batch
 
 def secure_append_data(queue, data, queue_lock):
     """
     Locks the thread while appending data to the queue. Ensures that the queue does not exceed the maximum length.
+    Wakes up a thread waiting for data.
     
     Args:
         queue (deque): Queue (buffer) where the data is appended.
         data: The data to be appended to the queue.
-        queue_lock (threading.Lock): Locking the thread to ensure that the data is not corrupted by other threads.
+        queue_lock (threading.Condition): Locking the thread to ensure that the data is not corrupted by other threads.
     """
     with queue_lock:
         if len(queue)  >= MAX_QUEUE_LEN:
             queue.popleft()
             logger.warning("Max queue len - deleting the oldest entry.")
         queue.append(data)
+        queue_lock.notify()
 
-def secure_read_data(queue, queue_lock):
+def secure_read_batch(queue, queue_lock, max_items: int, timeout: float =0.0):
     """
-    Locks the thread while reading data from the queue. Removes the read data.
+    Locks the thread while reading up to max_items entries from the queue. Removes the read data.
+    If the queue is empty, waits until new data is appended or the timeout is reached.
     
     Args:
         queue (deque): Queue which serves as the source.
-        queue_lock (threading.Lock): Locking the thread to ensure that the data is not corrupted by other threads.
+        queue_lock (threading.Condition): Locking the thread to ensure that the data is not corrupted by other threads.
+        max_items (int): Maximum number of entries read at once.
+        timeout (float, default=0.0): Max. time in sec to wait for data. 0 returns immediately, None waits without limit.
+        
+    Returns:
+        batch (list): The read data in queue order. Empty if no data arrived in time.
     """
     with queue_lock:
-        if queue:
-            return queue.popleft()
-        return None
+        queue_lock.wait_for(lambda: queue, timeout)
+        # Usual case: the whole queue fits into one batch and is copied at once.
+        if len(queue) <= max_items:
+            batch = list(queue)
+            queue.clear()
+            return batch
+        return [queue.popleft() for _ in range(max_items)]
 
-def secure_append_left_data(queue, data, queue_lock):
+def secure_extend_left_data(queue, data: list, queue_lock):
     """
-    Locks the thread while appending data to the queue on the left side. Ensures that the queue does not exceed the maximum length.
+    Locks the thread while putting a batch of data back to the left side of the queue, keeping the order of the batch.
+    Ensures that the queue does not exceed the maximum length.
     
     Args:
         queue (deque): Queue (buffer) where the data is appended.
-        data: The data to be appended to the queue.
-        queue_lock (threading.Lock): Locking the thread to ensure that the data is not corrupted by other threads.
+        data (list): The data to be appended to the queue.
+        queue_lock (threading.Condition): Locking the thread to ensure that the data is not corrupted by other threads.
     """
     with queue_lock:
-        if len(queue)  >= MAX_QUEUE_LEN:
-            queue.popleft()
-            logger.warning("Max queue len - deleting the oldest entry.")
-        queue.appendleft(data)
+        queue.extendleft(reversed(data))
+        if len(queue) > MAX_QUEUE_LEN:
+            logger.warning("Max queue len - deleting the oldest entries.")
+            while len(queue) > MAX_QUEUE_LEN:
+                queue.popleft()
+        queue_lock.notify()
 
+def store_temp_data(timestamps: list, is_anomalies: list):
+    """
+    Writes a batch of results to the temp data ring buffer.
+    The oldest entries are overwritten once the buffer is full.
+    No lock required: the detection thread is the only writer, the cursor is only moved after the entries are written.
+    
+    Args:
+        timestamps (list): The timestamps of the input data (ISO format).
+        is_anomalies (list): The prediction for each input.
+    """
+    global temp_data_cursor
+    timestamps = pd.to_datetime(timestamps, errors="coerce").to_numpy(dtype="datetime64[ns]")
+    batch_len = len(timestamps)
+    positions = (temp_data_cursor + np.arange(batch_len)) % TEMP_DATA_LEN
+    temp_timestamps[positions] = timestamps
+    temp_is_anomaly[positions] = is_anomalies
+    # Publishes the new entries to read_temp_data (the assignment is atomic).
+    temp_data_cursor += batch_len
 
-def normalize_scores(score, temp=10.0):
+def read_temp_data():
+    """
+    Copies the timestamps and predictions from the filled part of the temp data ring buffer, without locking the writer.
+    Only entries published by the cursor are read. If the buffer is full, the copy can contain some entries
+    of the batch currently written instead of the oldest ones, which does not matter for the health check statistics.
+    
+    Returns:
+        timestamps (np.ndarray): The timestamps of the latest results (datetime64). Not sorted by time.
+        is_anomaly (np.ndarray): The predictions of the latest results, same order as the timestamps.
+    """
+    filled = min(temp_data_cursor, TEMP_DATA_LEN)
+    return temp_timestamps[:filled].copy(), temp_is_anomaly[:filled].copy()
+
+
+def ocsvm_decision_function(features: np.ndarray):
+    """
+    Calculates the OCSVM decision function (distance to the margin) with the extracted model parameters.
+    Same result as ocsvm_model.decision_function for the RBF kernel (within float32 precision), the distances to all support vectors
+    are calculated with one matrix product: ||x - sv||² = ||x||² + ||sv||² - 2x·sv, gamma is already part of the extracted terms.
+    The inputs are shifted by kernel_center (in float64) before the product, like the support vectors.
+    Other models (e.g. the Random-Fourier-Features pipeline) use their own decision function.
+    
+    Args:
+        features (np.ndarray): The model input, shape (batch size, number of features).
+        
+    Returns:
+        decision_scores (np.ndarray): The decision score for each input. Negative values are anomalies.
+    """
+    if not use_rbf_kernel:
+        return ocsvm_model.decision_function(features)
+    
+    features = (features - kernel_center).astype(np.float32)
+    feature_terms = kernel_gamma * np.einsum("ij,ij->i", features, features)
+    
+    # exponents = -gamma * ||x - sv||², each term is added in place.
+    exponents = features @ scaled_support_vectors_t
+    exponents += support_vector_terms
+    exponents -= feature_terms[:, np.newaxis]
+    # Rounding can lead to slightly positive values for inputs on a support vector (negative distance).
+    np.minimum(exponents, 0, out=exponents)
+    
+    kernel_values = np.exp(exponents, out=exponents)
+    decision_scores = kernel_values @ dual_coef + intercept
+    return decision_scores
+
+
+def normalize_scores(scores: np.ndarray):
     """ 
-    Used to normalize the score (distance to margin) in order to create a class membership probability.
+    Used to normalize the scores (distance to margin) in order to create a class membership probability.
+    Sigmoid of score / temp, higher values of temp lead to "more mixed probabilities".
     
     Args:
-        score: The distance to the margin to be normalized.
-        temp: Used as a factor for normalizing. Higher values lead to "more mixed probabilities".
+        scores (np.ndarray): The distances to the margin to be normalized.
         
     Return:
-        New score that equals a probability.
+        New scores that equal a probability.
     """
-    if temp <= 0:
-        temp = 10.0
-        logger.warning("Temp set too low, changed to standard value of 10.")
-    return 1 / (1 + np.exp(-score / temp))
+    return expit(scores * inv_temp)
 
 
-def calc_sensor_data_time(data: pd.DataFrame):
+def calc_sensor_data_time(timestamps: np.ndarray):
     """
     Calculates the time delta between the generated data stored in the temp-data storage.
+    The mean of the differences between the sorted timestamps equals (latest - earliest) / (count - 1), no sorting required.
     Used for health check.
     Args:
-        data (pd.DataFrame): Dataset with timestamp.
+        timestamps (np.ndarray): The timestamps (datetime64[ns]), invalid timestamps (NaT) are ignored.
     Returns:
-        avg_time: Average time between the generated data.
+        avg_time: Average time between the generated data in seconds. 0 if there are less than two valid timestamps.
     """
-    sorted_data = data.sort_values(by="timestamp")
-    time_differences = sorted_data["timestamp"].diff().dropna()
+    valid_timestamps = timestamps[~np.isnat(timestamps)].view(np.int64)
+    if len(valid_timestamps) < 2:
+        return 0
     
-    avg_time = time_differences.mean().total_seconds()
-    return avg_time
+    avg_time = (valid_timestamps.max() - valid_timestamps.min()) / (len(valid_timestamps) - 1) * 1e-9
+    return float(avg_time)
 
-def calc_anomaly_ratio(data: pd.DataFrame):
+def calc_anomaly_ratio(is_anomaly: np.ndarray):
     """
     Calculates the anomaly ratio.
     Used for health check.
     Args:
-        data (pd.DataFrame): Dataset with timestamp.
+        is_anomaly (np.ndarray): The predictions (bool).
     Return:
         anomaly_ratio: The anomaly ration in the data.        
     """
-    anomaly_count = data["is_anomaly"].sum()
-    total_count = len(data)
-    anomaly_ratio = (anomaly_count/total_count) * 100
-    return anomaly_ratio
+    anomaly_ratio = is_anomaly.mean() * 100
+    return float(anomaly_ratio)
 
 def anomaly_detection():
     """
     Runs the anomaly detection algorithm and appends the data to the buffers.
+    All queued inputs (up to DETECTION_BATCH_SIZE entries) are evaluated with one model call.
     """
-    expected_features = ocsvm_model.feature_names_in_
-
     while True:
         try:
-            input_data = secure_read_data(input_data_queue, input_data_lock)
-            if input_data:
-                missing_features = [feature for feature in expected_features if feature not in input_data]
-                if missing_features:
-                    logger.error(f"Data does not fit the model.")
-                    break
-                
-                data_array = np.array([[input_data[feature] for feature in expected_features]])
-                data_df = pd.DataFrame(data_array, columns=expected_features)
-                
-                decision_score = ocsvm_model.decision_function(data_df)[0]
-                probability = normalize_scores(decision_score)
-                prediction = ocsvm_model.predict(data_df)
-                is_anomaly = bool(prediction[0] == -1)
+            input_batch = []
+            # The features are checked by detection_service, invalid values only skip the affected input.
+            for input_data in read_input_batch(DETECTION_BATCH_SIZE, timeout=1.0):
+                try:
+                    model_input[len(input_batch)] = feature_getter(input_data)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.error(f"Data does not fit the model, skipping the input: {e}")
+                    continue
+                input_batch.append(input_data)
+            
+            if input_batch:
+                batch_input = model_input[:len(input_batch)]
                 
-                result = {
-                    "is_anomaly": is_anomaly,
-                    "anomaly_probability" : probability,
-                    "details": "Anomaly detected" if is_anomaly else "Normal behavior"
-                }
+                decision_scores = ocsvm_decision_function(batch_input)
+                probabilities = normalize_scores(decision_scores).tolist()
+                # Same as predict() == -1, without evaluating the kernel a second time.
+                is_anomalies = (decision_scores <= 0).tolist()
                 
-                output_data = {
-                    "data": input_data,
-                    "result": result,
-                }
-                secure_append_data(output_data_queue, output_data, output_data_lock)
+                for input_data, probability, is_anomaly in zip(input_batch, probabilities, is_anomalies):
+                    result = {
+                        "is_anomaly": is_anomaly,
+                        "anomaly_probability" : probability,
+                        "details": "Anomaly detected" if is_anomaly else "Normal behavior"
+                    }
+                    
+                    output_data = {
+                        "data": input_data,
+                        "result": result,
+                    }
+                    secure_append_data(output_data_queue, output_data, output_data_lock)
                 
-                with temp_data_lock:
-                    global temp_data
-                    new_entry = pd.DataFrame([{**{feat: input_data[feat] for feat in expected_features}, 
-                                               "timestamp": input_data["timestamp"],
-                                               "is_anomaly": is_anomaly}])
-                    temp_data = pd.concat([temp_data, new_entry], ignore_index=True)
-                    if len(temp_data) > 1000:
-                        temp_data = temp_data.iloc[-1000:]
-            else:
-                time.sleep(1.0)
+                store_temp_data([input_data.get("timestamp") for input_data in input_batch], is_anomalies)
 
         except Exception as e:
             logger.error(f"Error detecting anomalies: {e}")
 
 
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 anomaly_detection_app = Flask(__name__)
+anomaly_detection_app.json = ORJSONProvider(anomaly_detection_app)
 
 
 @anomaly_detection_app.route("/detection_service", methods=["POST"])
 def detection_service():
     """
     Endpoint which starts the anomaly detection.
+    Accepts a single data point or a batch of data points ({"batch": [...]}).
+    A batch is only queued if all data points fit the model.
     """
     try:
         input_data = request.json
         if not input_data:
             return jsonify({"error": "No input data provided"}), 400
         
-        secure_append_data(input_data_queue, input_data, input_data_lock)
-        logger.info(f"Received and queued input data: {input_data}")
+        entries = input_data.get("batch", [input_data])
+        if not entries:
+            return jsonify({"error": "No input data provided"}), 400
+        
+        for entry in entries:
+            missing_features = MODEL_FEATURES_SET.difference(entry)
+            if missing_features:
+                logger.error(f"Data does not fit the model. Missing features: {sorted(missing_features)}")
+                return jsonify({"error": f"Missing features: {sorted(missing_features)}"}), 400
+        
+        for entry in entries:
+            put_input_data(entry)
+        logger.debug("Received and queued input data: %s", entries)
         return jsonify({"message": "Data received successfully"}), 200
     
     except Exception as e:
@@ -214,24 +407,34 @@ def detection_service():
         
 def send_data_to_dashboard():
     """
-    Sends the data from the buffer to the dashboard regularly.    
+    Sends the data from the buffer to the dashboard regularly.
+    All queued data (up to DASHBOARD_BATCH_SIZE entries) is sent with one request.
+    Waits for new data while the queue is empty.
     """
+    sent_count = 0
     while True:
-        logger.info(f"Transfer - triggered at {datetime.now()} - data queue len: {len(output_data_queue)}")
-        transfer_data = secure_read_data(output_data_queue, output_data_lock)
+        transfer_data = secure_read_batch(output_data_queue, output_data_lock, DASHBOARD_BATCH_SIZE, timeout=None)
         if transfer_data:
+            logger.debug("Transfer - batch size: %d - data queue len: %d", len(transfer_data), len(output_data_queue))
             try:
-                dashboard_response = requests.post(DASHBOARD_SERVICE_URL, json=transfer_data)
+                body = orjson.dumps({"batch": transfer_data}, option=orjson.OPT_SERIALIZE_NUMPY)
+                dashboard_response = dashboard_session.post(DASHBOARD_SERVICE_URL, data=body, headers=JSON_HEADERS, timeout=(1.0, 5.0))
                 if dashboard_response.status_code == 200:
-                    logger.info(f"Transfer - Data sent at {datetime.now()}")
+                    sent_count += len(transfer_data)
+                    if sent_count >= TRANSFER_LOG_INTERVAL:
+                        logger.info(f"Transfer - {sent_count} results sent - data queue len: {len(output_data_queue)}")
+                        sent_count = 0
                 else:
                     logger.error(f"Failed to forward data. Error: {dashboard_response.status_code}")
-                    secure_append_left_data(output_data_queue, transfer_data, output_data_lock)
+                    secure_extend_left_data(output_data_queue, transfer_data, output_data_lock)
+                    # The data is available again immediately, pause to not flood a failing dashboard.
+                    time.sleep(1.0)
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Error sending data to the dashboard: {e}")
+                secure_extend_left_data(output_data_queue, transfer_data, output_data_lock)
+                time.sleep(1.0)
             except Exception as e:
                 logger.error(f"Error sending data to the dashboard: {e}")
-        else:
-            logger.info("Transfer - No queued data.")
-            time.sleep(1.0)
 
 
 @anomaly_detection_app.route("/health_check", methods=["POST"])
@@ -240,13 +443,13 @@ def check_model_health():
     Used to check the model health (some parameters).
     """
     logger.info("Triggered health check")
-    base_data = temp_data
     try:
+        timestamps, is_anomaly = read_temp_data()
         if ocsvm_model is None:
             logger.error("Model is not loaded correctly.")
             return jsonify({"status": "fail", "message": "Model is not loaded."}), 500
     
-        input_queue_size = len(input_data_queue)
+        input_queue_size = input_data_queue.qsize()
         output_queue_size = len(output_data_queue)
         logger.info(f"Input queue size: {input_queue_size}, Output queue size: {output_queue_size}")
         
@@ -266,17 +469,10 @@ def check_model_health():
         avg_time = 0
         anomaly_ratio = 0
         
-        logger.info(f"type base data: {type(base_data)}")
-
-        base_data['timestamp'] = pd.to_datetime(base_data['timestamp'], errors='coerce')
-        base_data['temperature'] = pd.to_numeric(base_data['temperature'], errors='coerce')
-        base_data['humidity'] = pd.to_numeric(base_data['humidity'], errors='coerce')
-        base_data['noise_level'] = pd.to_numeric(base_data['noise_level'], errors='coerce')
-
-        if not base_data.empty:
-            logger.info(f"Base data not empty and of type: {type(base_data)}")
-            avg_time = calc_sensor_data_time(base_data)
-            anomaly_ratio = calc_anomaly_ratio(base_data)
+        # The buffers are already typed when written, no conversion required.
+        if len(timestamps):
+            avg_time = calc_sensor_data_time(timestamps)
+            anomaly_ratio = calc_anomaly_ratio(is_anomaly)
         else:
             logger.warning("Base data is empty. Skipping calculation for avg_time and anomaly_ratio.")
         
@@ -289,7 +485,6 @@ def check_model_health():
             "avg_time" : avg_time,
             "anomaly_ratio" : anomaly_ratio
         }
-        logger.info(health_status)
         return jsonify(health_status), 200
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -302,17 +497,19 @@ def start_anomaly_detection():
     """
     logger.info("Starting anomaly detection process...")
     anomaly_detection()
-            
 
-if __name__ == "__main__":
-    detection_thread = threading.Thread(target=start_anomaly_detection)
-    detection_thread.daemon = True
-    detection_thread.start()    
+
+def start_background_threads():
+    """
+    Starts the anomaly detection and the transfer of the results to the dashboard.
+    """
+    detection_thread = threading.Thread(target=start_anomaly_detection, daemon=True)
+    detection_thread.start()
     
-    send_data_thread = threading.Thread(target=send_data_to_dashboard)
-    send_data_thread.daemon = True
+    send_data_thread = threading.Thread(target=send_data_to_dashboard, daemon=True)
     send_data_thread.start()
-    
+
+# When served by gunicorn, the threads are started by the post_worker_init hook (gunicorn.conf.py).
+if __name__ == "__main__":
+    start_background_threads()
     anomaly_detection_app.run(host="0.0.0.0", port=5001)
-    
-    
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration of the anomaly detection service.
+"""
+
+bind = "0.0.0.0:5001"
+
+# The queues and the temporary dataset are kept in the memory of the process.
+# More workers would split the data between independent processes, scale with the threads instead.
+workers = 1
+worker_class = "gthread"
+threads = 8
+
+
+def post_worker_init(worker):
+    """
+    Starts the anomaly detection and the transfer to the dashboard in the worker process, after the app is loaded.
+    """
+    from anomaly_detection import start_background_threads
+    start_background_threads()
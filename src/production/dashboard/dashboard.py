@@ -1,54 +1,83 @@
 import logging
+import orjson
 import os
 import requests
 import threading
-import time
 
 from collections import deque
-from datetime import datetime
 from flask import Flask, request, jsonify, render_template
+from flask.json.provider import DefaultJSONProvider
+from queue import Empty, Full, Queue
+from requests.adapters import HTTPAdapter
 
-logging.basicConfig(level=logging.INFO)
+# Set LOG_LEVEL=DEBUG to log every transferred message.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
 MAX_QUEUE_LEN = 100
 DETECTION_SERVICE_URL = os.getenv("DETECTION_SERVICE_URL", "http://anomaly_detection_container:5001/health_check")
 
 
-anomaly_queue = deque()
-input_data_queue = deque()
-output_data_queue = deque()
-anomaly_lock = threading.Lock()
-input_data_lock = threading.Lock()
-output_data_lock = threading.Lock()
+# The deques drop the oldest entry when a new one is appended to a full queue.
+anomaly_queue = deque(maxlen=MAX_QUEUE_LEN)
+# Bounded queue with a blocking read, the sorting thread waits for new data instead of polling.
+input_data_queue = Queue(maxsize=MAX_QUEUE_LEN)
+output_data_queue = deque(maxlen=MAX_QUEUE_LEN)
+# No locks for the deques: append (including dropping the oldest entry) and popleft are single C calls,
+# which are atomic under the GIL of CPython. Requires a CPython build with GIL.
 
-def secure_append_data(queue, data, queue_lock):
+detection_session = requests.Session()
+detection_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+def put_input_data(data):
     """
-    Locks the thread while appending data to the queue. Ensures that the queue does not exceed the maximum length.
+    Appends data to the input queue. Deletes the oldest entry if the queue is full.
+    
+    Args:
+        data: The data to be appended to the queue.
+    """
+    while True:
+        try:
+            input_data_queue.put_nowait(data)
+            return
+        except Full:
+            try:
+                input_data_queue.get_nowait()
+                logger.warning("Max queue len - deleting the oldest entry.")
+            except Empty:
+                pass
+
+def secure_append_data(queue, data):
+    """
+    Appends data to the queue (thread safe without lock, see above).
+    The queue is bounded (maxlen), the oldest entry is dropped by the deque itself when the queue is full.
     
     Args:
         queue (deque): Queue (buffer) where the data is appended.
         data: The data to be appended to the queue.
-        queue_lock (threading.Lock): Locking the thread to ensure that the data is not corrupted by other threads.
     """
-    with queue_lock:
-        if len(queue)  >= MAX_QUEUE_LEN:
-            queue.popleft()
-            logger.warning("Max queue len - deleting the oldest entry.")
-        queue.append(data)
+    queue.append(data)
 
-def secure_read_data(queue, queue_lock):
+def secure_drain(queue, max_items: int):
     """
-    Locks the thread while reading data from the queue. Removes the read data.
+    Reads up to max_items entries from the queue. Removes the read data.
+    Each entry is removed with one popleft (thread safe without lock, see above), an entry is never read twice.
     
     Args:
         queue (deque): Queue which serves as the source.
-        queue_lock (threading.Lock): Locking the thread to ensure that the data is not corrupted by other threads.
+        max_items (int): Maximum number of entries read at once.
+        
+    Returns:
+        batch (list): The read data in queue order. Empty if the queue is empty.
     """
-    with queue_lock:
-        if queue:
-            return queue.popleft()
-        return None
+    batch = []
+    try:
+        while len(batch) < max_items:
+            batch.append(queue.popleft())
+    except IndexError:
+        # The queue is empty.
+        pass
+    return batch
 
 def sort_data():
     """
@@ -57,35 +86,43 @@ def sort_data():
     logger.info("Sorting started")
     while True:
         try:
-            #logger.info(f"Sorting - Data Input queue: {len(input_data_queue)}")
-            input_data = secure_read_data(input_data_queue, input_data_lock)
-            if input_data:
-                if input_data['result']['is_anomaly']:
-                    secure_append_data(anomaly_queue, input_data, anomaly_lock)
-                secure_append_data(output_data_queue, input_data, output_data_lock)
-                #logger.info("Data sorted successfully.")
-            else:
-                #logger.info("Sorting - Waiting - Empty queue.")
-                time.sleep(1.0)
+            #logger.info(f"Sorting - Data Input queue: {input_data_queue.qsize()}")
+            # Blocks until new data is received.
+            input_data = input_data_queue.get()
+            if input_data['result']['is_anomaly']:
+                secure_append_data(anomaly_queue, input_data)
+            secure_append_data(output_data_queue, input_data)
+            #logger.info("Data sorted successfully.")
         except Exception as e:
             logger.error(f"Error sorting data: {e}")
 
 
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 dashboard_app = Flask(__name__)
+dashboard_app.json = ORJSONProvider(dashboard_app)
 
 @dashboard_app.route("/receive_data", methods=["POST"])
 def receive_data():
     """
     Takes the output of the anomaly detection and appends it to the input queue.
+    Accepts a single result or a batch of results ({"batch": [...]}).
     """
     try:
-        #logger.info(f"AD - Data requested at: {datetime.now()}")
         input_data = request.json
         if not input_data:
             return jsonify({"error": "No input data provided"}), 400
 
-        secure_append_data(input_data_queue, input_data, input_data_lock)
-        #logger.info(f"AD - Data appended to input data at: {datetime.now()}")
+        entries = input_data.get("batch", [input_data])
+        for entry in entries:
+            put_input_data(entry)
+        logger.debug("AD - %d results received - input queue size: %d", len(entries), input_data_queue.qsize())
         return jsonify({"message": "Data received successfully"}), 200
     
     except Exception as e:
@@ -104,25 +141,16 @@ def index():
 def get_latest_data():
     """
     Loads the data to the dashboard.
+    All queued entries are returned at once (lists, empty if there is no new data), the polling is done by the dashboard.
     """
-    #logger.info(f"Dashboard - Data requested at {datetime.now()}")
-    #logger.info(f"Dashboard - Output queue size {len(output_data_queue)}")
     try:
-        new_output_data = secure_read_data(output_data_queue, output_data_lock)
-        new_anomaly_data = secure_read_data(anomaly_queue, anomaly_lock)
-        #logger.info(f"Dashboard - Data loaded from queue at {datetime.now()}")
-        #logger.info(f"Dashboard - Data Output Queue size {len(output_data_queue)}")
-        if new_output_data:
-            return jsonify({
-                "output_data": new_output_data,
-                "anomaly_data": new_anomaly_data
-            }), 200
-        else:
-            time.sleep(1.0)            
-            return jsonify({
-                "output_data": None,
-                "anomaly_data": None
-            }), 200
+        new_output_data = secure_drain(output_data_queue, MAX_QUEUE_LEN)
+        new_anomaly_data = secure_drain(anomaly_queue, MAX_QUEUE_LEN)
+        logger.debug("Dashboard - %d results and %d anomalies loaded", len(new_output_data), len(new_anomaly_data))
+        return jsonify({
+            "output_data": new_output_data,
+            "anomaly_data": new_anomaly_data
+        }), 200
 
     except Exception as e:
         logger.error(f"Error retrieving latest data: {e}")
@@ -135,7 +163,7 @@ def check_health():
     Endpoint to call the anomaly detection health check and return the result.
     """
     try:
-        response = requests.post(DETECTION_SERVICE_URL, timeout=5)
+        response = detection_session.post(DETECTION_SERVICE_URL, timeout=5)
         response_data = response.json()
         return jsonify(response_data), response.status_code
     except requests.exceptions.RequestException as e:
@@ -151,9 +179,8 @@ def start_background_thread():
     thread = threading.Thread(target=sort_data, daemon=True)
     thread.start()
 
-with dashboard_app.app_context():
-    start_background_thread()
-
+# When served by gunicorn, the thread is started by the post_worker_init hook (gunicorn.conf.py).
 if __name__ == "__main__":
     logger.info("Dashboard started")
+    start_background_thread()
     dashboard_app.run(host="0.0.0.0", port=5002)
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration of the dashboard service.
+"""
+
+bind = "0.0.0.0:5002"
+
+# The queues are kept in the memory of the process.
+# More workers would split the data between independent processes, scale with the threads instead.
+workers = 1
+worker_class = "gthread"
+threads = 8
+
+
+def post_worker_init(worker):
+    """
+    Starts the sorting of the received data in the worker process, after the app is loaded.
+    """
+    from dashboard import start_background_thread
+    start_background_thread()
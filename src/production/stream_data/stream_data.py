@@ -1,17 +1,22 @@
-import json
 import logging
 import numpy as np
+import orjson
 import os
-import random
 import requests
 import signal
 import time
 
+from collections import deque
 from datetime import datetime
 from flask import Flask, jsonify, request
-from threading import Thread, Event
-
-logging.basicConfig(level=logging.INFO)
+from flask.json.provider import DefaultJSONProvider
+from functools import cache, partial
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from threading import Condition, Thread, Event
+
+# Set LOG_LEVEL=DEBUG to log every transferred message.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
 
 # Use this to run it locally from the project directory:
@@ -24,6 +29,31 @@ DETECTION_SERVICE_URL = os.getenv("DETECTION_SERVICE_URL", "http://anomaly_detec
 MAX_RETRIES = 5
 INITIAL_WAIT_TIME = 2
 WAIT_TIME_MULTIPLIER = 2
+# Waiting time in sec before the next attempt, after 1, 2, ... failed attempts: (2, 4, 8, 16, 32)
+BACKOFFS = tuple(INITIAL_WAIT_TIME * WAIT_TIME_MULTIPLIER ** attempt for attempt in range(MAX_RETRIES))
+BATCH_SIZE = 10         # Max. number of data points sent with one request
+MAX_BATCH_DELAY = 2.0   # Max. time in sec a data point waits for the batch to be sent
+POOL_SIZE = 1024        # Number of values drawn at once per feature
+OUTPUT_BUFFER_LEN = 4096 # Max. number of data points waiting to be sent, the oldest are dropped first
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# One random generator for the whole stream.
+RNG = np.random.default_rng()
+
+# Maps the distribution names of the features config to the generator: (params, sample_size) -> np.ndarray
+# The params may be arrays with one value per feature, the generators broadcast them over the columns.
+DISTRIBUTIONS = {
+    "normal": lambda params, size: RNG.normal(params["mean"], params["std"], size),
+    "uniform": lambda params, size: RNG.uniform(params["low"], params["high"], size),
+    "exponential": lambda params, size: RNG.exponential(params["scale"], size),
+    "poisson": lambda params, size: RNG.poisson(params["lam"], size),
+    "lognormal": lambda params, size: RNG.lognormal(params["mean"], params["sigma"], size),
+    "gamma": lambda params, size: RNG.gamma(params["shape"], params["scale"], size),
+    "beta": lambda params, size: RNG.beta(params["a"], params["b"], size),
+    "weibull": lambda params, size: RNG.weibull(params["a"], size),
+    "triangular": lambda params, size: RNG.triangular(params["left"], params["mode"], params["right"], size),
+    "chisquare": lambda params, size: RNG.chisquare(params["df"], size),
+}
 
 # Set duration = 0 for infinite mode
 duration = 600.0 #seconds
@@ -33,6 +63,15 @@ interval = 1 #seconds
 streaming_status = False
 stop_streaming = Event()
 
+# Filled by stream_data, drained by send_data. The condition wakes the sender when a batch is complete.
+output_buffer = deque(maxlen=OUTPUT_BUFFER_LEN)
+output_condition = Condition()
+# Sent data points are returned by send_data and reused by stream_data, instead of creating a new dict per data point.
+data_point_pool = deque(maxlen=OUTPUT_BUFFER_LEN)
+
+detection_session = requests.Session()
+detection_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
 
 def graceful_shutdown(signal, frame):
     """ Function used to terminate the data stream manually. """
@@ -43,9 +82,11 @@ def graceful_shutdown(signal, frame):
 signal.signal(signal.SIGINT, graceful_shutdown)
 
 
+@cache
 def load_features_config(file_path):
     """
     Load the features configuration from a JSON file.
+    The file is only read once, a restart of the stream reuses the loaded configuration.
     
     Args:
         file_path (str): Path to the JSON file containing the feature configuration.
@@ -53,140 +94,216 @@ def load_features_config(file_path):
     Returns:
         json: Features configuration.
     """
-    with open(file_path, "r") as file:
-        return json.load(file)
+    return orjson.loads(Path(file_path).read_bytes())
 
 
-def generate_sensor_value(distribution: str, params, sample_size: int =1):
+def get_distribution(distribution: str):
     """
-    Generates data based on the definitions in the features config.
+    Resolves the distribution of the features config to its generator function.
+    Used once per distribution when the stream starts, not per generated value.
     
     Args:
         distribution (str): Information about the underlying distribution.
-        params: Contains the needed parameters to define the distribution.
-        sample_size (int): Determines how many data points are generated. Take 1 for data stream.
         
     Returns:
-        Random value for the sensor.
+        The generator function: (params, sample_size) -> np.ndarray
     """
+    try:
+        return DISTRIBUTIONS[distribution]
+    except KeyError:
+        raise ValueError(f"Distribution not supported: {distribution}") from None
 
-    if distribution == "normal":
-        return np.random.normal(params["mean"], params["std"], sample_size)
-    elif distribution == "uniform":
-        return np.random.uniform(params["low"], params["high"], sample_size)
-    elif distribution == "exponential":
-        return np.random.exponential(params["scale"], sample_size)
-    elif distribution == "poisson":
-        return np.random.poisson(params["lam"], sample_size)
-    elif distribution == "lognormal":
-        return np.random.lognormal(params["mean"], params["sigma"], sample_size)
-    elif distribution == "gamma":
-        return np.random.gamma(params["shape"], params["scale"], sample_size)
-    elif distribution == "beta":
-        return np.random.beta(params["a"], params["b"], sample_size)
-    elif distribution == "weibull":
-        return np.random.weibull(params["a"], sample_size)
-    elif distribution == "triangular":
-        return np.random.triangular(params["left"], params["mode"], params["right"], sample_size)
-    elif distribution == "chisquare":
-        return np.random.chisquare(params["df"], sample_size)
-    else:
-        raise ValueError(f"Distribution not supported: {distribution}")
+
+def sensor_value_rows(features_config):
+    """
+    Provides the sensor values row by row (one value per feature), while drawing POOL_SIZE rows at once.
+    Features with the same distribution are drawn together with one generator call.
+    The anomalies of all features are selected with one random mask and replace the normal values.
+    
+    Args:
+        features_config: Contains the feature definition.
+        
+    Yields:
+        list: The values of the next data point, in the order of the features config.
+    """
+    features = list(features_config.values())
+    columns_by_distribution = {}
+    for column, feature in enumerate(features):
+        columns_by_distribution.setdefault(feature["distribution"], []).append(column)
+    
+    # The distribution is resolved once, refilling the pool calls the generators directly.
+    # The params of a group are stacked into arrays: {"mean": [22, 50, 80], ...} -> one column per feature.
+    draw_functions = []
+    for distribution, columns in columns_by_distribution.items():
+        group_params = {name: np.array([features[column]["params"][name] for column in columns])
+                        for name in features[columns[0]]["params"]}
+        draw_function = partial(get_distribution(distribution), group_params, (POOL_SIZE, len(columns)))
+        draw_functions.append((np.array(columns), draw_function))
+    
+    anomaly_ranges = np.array([feature["anomaly_range"] for feature in features], dtype=np.float64)
+    anomaly_ratios = np.array([feature.get("anomaly_ratio") for feature in features], dtype=np.float64)
+    pool_shape = (POOL_SIZE, len(features))
+    normal_values = np.empty(pool_shape)
+    
+    while True:
+        for columns, draw_values in draw_functions:
+            normal_values[:, columns] = draw_values()
+        anomaly_values = RNG.uniform(anomaly_ranges[:, 0], anomaly_ranges[:, 1], pool_shape)
+        anomaly_mask = RNG.random(pool_shape) < anomaly_ratios
+        yield from np.where(anomaly_mask, anomaly_values, normal_values).tolist()
 
 
-def generate_data(features_config):
+def generate_data(feature_names: list, value_rows, data_point: dict = None):
     """
     Triggers the generation of data based on the configuration.
-    Replaces randomly values with anomalies.
+    The values are already combined with the anomalies, see sensor_value_rows.
     
     Args:
-        features_config: Contains the feature definition.
+        feature_names (list): The names of the features, in the order of the features config.
+        value_rows: Provides the values of a data point, see sensor_value_rows.
+        data_point (dict, optional): A sent data point to be reused, all its values are overwritten.
         
     Returns:
         data_point: Contains values for the sensors plus a timestamp.
     """
-
-    data_point = {"timestamp": datetime.now().isoformat()}
-
-    for feature in features_config.values():
-        feature_name = feature["name"]
-        distribution = feature["distribution"]
-        params = feature["params"]
-        anomaly_ratio = feature.get("anomaly_ratio")
-        anomaly_range = feature["anomaly_range"]
-
-        if random.random() < anomaly_ratio:
-            value = random.uniform(*anomaly_range)
-        else:
-
-            value = generate_sensor_value(
-                distribution=distribution,
-                params=params,
-                sample_size=1
-            )[0]
-
-        data_point[feature_name] = value
-
+    if data_point is None:
+        data_point = {}
+    # orjson formats the datetime (ISO format) when the batch is sent, no string is built per data point.
+    data_point["timestamp"] = datetime.now()
+    data_point.update(zip(feature_names, next(value_rows)))
     return data_point
 
 
-def stream_data():
+def send_batch(batch: list):
     """
-    Generates a stream of data.
-    Stops automatically after defined time. Infinite mode is possible.
-    Sends the data to the detection service.
+    Sends a batch of data points to the detection service with one request.
+    
+    Args:
+        batch (list): The data points to be sent.
+        
+    Raises:
+        requests.exceptions.RequestException: If the detection service is not reachable or does not accept the data.
     """
-    features_config = load_features_config(FEATURES_CONFIG_PATH)
+    body = orjson.dumps({"batch": batch})
+    response = detection_session.post(DETECTION_SERVICE_URL, data=body, headers=JSON_HEADERS, timeout=6)
+    if response.status_code != 200:
+        logger.error(f"Detection service error: {response.status_code}, {response.text}")
+        raise requests.exceptions.RequestException(f"Detection service error: {response.status_code}")
+
+
+def send_data(producer_done: Event):
+    """
+    Sends the data points of the output buffer to the detection service in batches.
+    A batch is sent after BATCH_SIZE data points or MAX_BATCH_DELAY seconds.
+    Data points of a failed request are kept and sent with the next attempt.
+    Returns after the remaining data points are sent, once the producer is done.
     
-    if duration == 0:
-        logger.info("Running in infinite streaming mode.")
-        endtime =float("inf")
-    else:
-        endtime = time.time() + duration
+    Args:
+        producer_done (Event): Set by stream_data when no more data points are generated.
+    """
     retries = 0
-     
+    batch = []
+    
     while True:
-        
-        if stop_streaming.is_set():
-            logger.info("Streaming stopped - streaming stop is set")
-            break
-        
-        if time.time() > endtime:
-            logger.info("Streaming stopped - endtime reached")
-            logger.info(f"Stream end time set to: {endtime} (current time: {time.time()})")
-            break
-        
-        sensor_data = generate_data(features_config=features_config)
+        if not batch:
+            with output_condition:
+                output_condition.wait_for(lambda: len(output_buffer) >= BATCH_SIZE or producer_done.is_set(), timeout=MAX_BATCH_DELAY)
+                batch = [output_buffer.popleft() for _ in range(min(len(output_buffer), BATCH_SIZE))]
+            if not batch:
+                if producer_done.is_set():
+                    break
+                continue
         
         try:
-            response = requests.post(DETECTION_SERVICE_URL, json=sensor_data, timeout=6)
-            if response.status_code == 200:
-                logger.info(f"data: {sensor_data} send to {DETECTION_SERVICE_URL} successfully")
-                retries = 0
-            else:
-                logger.error(f"Detection service error: {response.status_code}, {response.text}")
-                raise requests.exceptions.RequestException(f"Detection service error: {response.status_code}")
-            waiting_time = interval
+            send_batch(batch)
+            logger.debug("data: %s send to %s successfully", batch, DETECTION_SERVICE_URL)
+            data_point_pool.extend(batch)
+            batch = []
+            retries = 0
             
         except requests.exceptions.RequestException as e:
             retries += 1
             logger.error(f"Error while calling the detection service. Attempt no.: {retries}/{MAX_RETRIES}: {str(e)}")
-        
+            
             if retries >= MAX_RETRIES:
                 logger.critical("Detection service not reachable. Stopping attempts.")
+                stop_streaming.set()
+                break
+            elif producer_done.is_set():
+                logger.error(f"Streaming stopped, {len(batch) + len(output_buffer)} data points are not sent.")
                 break
             else:
-                waiting_time = INITIAL_WAIT_TIME * (WAIT_TIME_MULTIPLIER ** (retries -1))
+                waiting_time = BACKOFFS[retries - 1]
                 logger.info(f"Retrying in {waiting_time} seconds.")
+                stop_streaming.wait(waiting_time)
         
         except Exception as e:
-            logger.critical(f"Error while generating or sending data: {str(e)}")
-            retries = MAX_RETRIES        
-                
-        time.sleep(waiting_time)
+            logger.critical(f"Error while sending data: {str(e)}")
+            stop_streaming.set()
+            break
+
+
+def stream_data():
+    """
+    Generates a stream of data.
+    Stops automatically after defined time. Infinite mode is possible.
+    The data points are buffered and sent by send_data in its own thread,
+    a slow detection service does not delay the generation.
+    """
+    features_config = load_features_config(FEATURES_CONFIG_PATH)
+    feature_names = [feature["name"] for feature in features_config.values()]
+    value_rows = sensor_value_rows(features_config)
+    
+    if duration == 0:
+        logger.info("Running in infinite streaming mode.")
+        endtime =float("inf")
+    else:
+        # Monotonic clock, the duration is not affected by changes of the system time.
+        endtime = time.monotonic() + duration
+    
+    producer_done = Event()
+    sender = Thread(target=send_data, args=(producer_done,), daemon=True)
+    sender.start()
+     
+    while not stop_streaming.is_set() and time.monotonic() < endtime:
+        try:
+            reused_data_point = data_point_pool.popleft() if data_point_pool else None
+            data_point = generate_data(feature_names=feature_names, value_rows=value_rows, data_point=reused_data_point)
+        except Exception as e:
+            logger.critical(f"Error while generating data: {str(e)}")
+            break
+        
+        with output_condition:
+            output_buffer.append(data_point)
+            if len(output_buffer) >= BATCH_SIZE:
+                output_condition.notify()
+        
+        # Returns immediately when the stream is stopped during the wait.
+        if stop_streaming.wait(interval):
+            break
+    
+    if stop_streaming.is_set():
+        logger.info("Streaming stopped - streaming stop is set")
+    elif time.monotonic() >= endtime:
+        logger.info("Streaming stopped - endtime reached")
+    
+    # The sender sends the remaining data points and returns.
+    with output_condition:
+        producer_done.set()
+        output_condition.notify()
+    sender.join()
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 stream_app = Flask(__name__)
+stream_app.json = ORJSONProvider(stream_app)
 
 
 def start_streaming():
@@ -209,7 +326,7 @@ def restart_stream():
     """ Re-starts the streaming service."""
     logger.info("Restarting the application.")
     start_streaming()
-    return jsonify({"message": "Streaming restarted."}, 200)
+    return jsonify({"message": "Streaming restarted."}), 200
 
 
 if __name__ == "__main__":